@@ -0,0 +1,47 @@
+"""
+Time to append 20 photos to an existing report, for a small and a large report.
+
+The existing reports are generated first (not timed), then append_to_report()
+adds the same 20 new photos to each. The time should barely depend on the
+report's size.
+
+Usage (from the project root):
+    python benchmarks/append_report.py [existing photo counts...]
+"""
+import io
+import os
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "src"))
+
+from PIL import Image
+from generator import create_photo_report, append_to_report
+
+TEMPLATE = os.path.join(PROJECT_ROOT, "assets", "上下兩張.docx")
+NEW_PHOTOS = 20
+
+def make_photos(count, seed):
+    """About 1 MB of JPEG per photo; noise so no two photos are identical"""
+    photos = []
+    for i in range(count):
+        buffer = io.BytesIO()
+        Image.effect_noise((1500, 1100), 60 + (seed + i) % 50).convert("RGB").save(buffer, format="JPEG", quality=95)
+        photos.append({'encoded': buffer.getvalue(), 'size': (1500, 1100)})
+    return photos
+
+def main():
+    counts = [int(arg) for arg in sys.argv[1:]] or [5, 100]
+    new_photos = make_photos(NEW_PHOTOS, seed=1000)
+    print(f"{'existing photos':>16} {'report (MB)':>12} {f'append {NEW_PHOTOS} (s)':>14}")
+    for count in counts:
+        report = create_photo_report({}, make_photos(count, seed=0), TEMPLATE)
+        size_mb = len(report.getvalue()) / 2**20
+
+        start = time.perf_counter()
+        append_to_report(report, {}, new_photos)
+        print(f"{count:>16} {size_mb:>12.0f} {time.perf_counter() - start:>14.2f}")
+
+if __name__ == "__main__":
+    main()
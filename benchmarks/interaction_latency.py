@@ -0,0 +1,122 @@
+"""
+Per-interaction latency of the photo grid at 50/200/500 photos, measured
+against a running `streamlit run` server.
+
+Editing a card's description is replayed the way the browser sends it: a
+rerun BackMsg carrying the new widget value, over the app's websocket. The
+time is from sending it until the server's script_finished ForwardMsg, so it
+includes the rerun, every ForwardMsg it produces and the local round trip.
+
+  full rerun     : the rerun has no fragment id, so the whole app.py script
+                   runs. Before cards became fragments every keystroke in a
+                   card paid this; sorting/deleting still do.
+  fragment rerun : the rerun carries the card's fragment id, as the browser
+                   sends it now, so only that photo card reruns.
+
+The server runs seeded_app.py (app.py with its photos pre-loaded); browser
+rendering is not included.
+
+Usage (from the project root):
+    python benchmarks/interaction_latency.py [photo counts...]
+"""
+import contextlib
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from websockets.sync.client import connect
+
+SEEDED_APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "seeded_app.py")
+REPEAT = 5
+
+@contextlib.contextmanager
+def running_server(count):
+    """`streamlit run` seeded_app.py with `count` photos on a free port; yields the port"""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "streamlit", "run", SEEDED_APP,
+            "--server.headless=true", f"--server.port={port}",
+            "--server.fileWatcherType=none", "--browser.gatherUsageStats=false",
+        ],
+        env=dict(os.environ, PHOTO_REPORT_BENCH_PHOTOS=str(count)),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        for _ in range(200):
+            try:
+                urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health")
+                break
+            except OSError:
+                time.sleep(0.1)
+        yield port
+    finally:
+        server.terminate()
+        server.wait()
+
+def rerun(ws, widget_id=None, value=None, fragment_id=None):
+    """Send a rerun like the browser does; return (elapsed ms, ForwardMsgs received)"""
+    msg = BackMsg()
+    msg.rerun_script.query_string = ""
+    if widget_id:
+        widget = msg.rerun_script.widget_states.widgets.add()
+        widget.id = widget_id
+        widget.string_value = value
+    if fragment_id:
+        msg.rerun_script.fragment_id = fragment_id
+
+    start = time.perf_counter()
+    ws.send(msg.SerializeToString())
+    received = []
+    while True:
+        forward = ForwardMsg()
+        forward.ParseFromString(ws.recv(timeout=600))
+        received.append(forward)
+        if forward.WhichOneof("type") == "script_finished":
+            return (time.perf_counter() - start) * 1000, received
+
+def find_card(messages, fname):
+    """(fragment id, description widget id) of the card for `fname`"""
+    fragment_id = widget_id = None
+    for forward in messages:
+        if forward.WhichOneof("type") != "delta" or forward.delta.WhichOneof("type") != "new_element":
+            continue
+        element = forward.delta.new_element
+        if element.WhichOneof("type") == "markdown" and element.markdown.body.endswith(f" {fname}**"):
+            fragment_id = forward.delta.fragment_id
+        elif element.WhichOneof("type") == "text_area" and element.text_area.id.endswith(f"-desc_{fname}"):
+            widget_id = element.text_area.id
+    return fragment_id, widget_id
+
+def measure(count):
+    target = f"IMG_{count // 2:04d}.jpg"
+    with running_server(count) as port:
+        with connect(f"ws://127.0.0.1:{port}/_stcore/stream", subprotocols=["streamlit"], max_size=None) as ws:
+            _, first_run = rerun(ws)  # seeds and pre-processes the photos
+            fragment_id, widget_id = find_card(first_run, target)
+            if not fragment_id or not widget_id:
+                raise RuntimeError(f"card for {target} not found in the first run")
+
+            full = [rerun(ws, widget_id, f"說明 {n}")[0] for n in range(REPEAT)]
+            fragment = [rerun(ws, widget_id, f"說明 {n}", fragment_id)[0] for n in range(REPEAT)]
+    return statistics.median(full), statistics.median(fragment)
+
+def main():
+    counts = [int(arg) for arg in sys.argv[1:]] or [50, 200, 500]
+    print(f"{'photos':>8} {'full rerun (ms)':>16} {'fragment rerun (ms)':>20} {'speed-up':>9}")
+    for count in counts:
+        full_ms, fragment_ms = measure(count)
+        print(f"{count:>8} {full_ms:>16.1f} {fragment_ms:>20.1f} {full_ms / fragment_ms:>8.0f}x")
+
+if __name__ == "__main__":
+    main()
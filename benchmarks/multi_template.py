@@ -0,0 +1,54 @@
+"""
+Time to produce every bundled template's report: one create_photo_report() call
+per template vs a single create_photo_reports() call.
+
+  raw photos     : photos given as PIL images, so encoding is part of the work.
+                   create_photo_reports() decodes/encodes each photo once and
+                   shares it between templates with the same encode_max_size.
+  pre-encoded    : photos already encoded, as app.py passes them after background
+                   pre-processing. Nothing is shared; the only difference is
+                   that the templates are built in parallel processes, so this
+                   gain scales with the core count (none on a single core).
+
+Usage (from the project root):
+    python benchmarks/multi_template.py [photo count]
+"""
+import os
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "src"))
+
+from PIL import Image
+from generator import create_photo_report, create_photo_reports, encode_photos, list_templates, detect_layout_style, LAYOUT_STYLES
+
+ASSETS_DIR = os.path.join(PROJECT_ROOT, "assets")
+TARGETS = [(os.path.join(ASSETS_DIR, t), detect_layout_style(t)) for t in list_templates(ASSETS_DIR)]
+
+def make_photos(count):
+    """2400x1800 noise images; noise so no two photos are identical"""
+    return [
+        {'no': f"{i+1:02d}", 'image': Image.effect_noise((2400, 1800), 60 + i % 50).convert("RGB")}
+        for i in range(count)
+    ]
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+    raw = make_photos(count)
+    encoded = encode_photos(raw, LAYOUT_STYLES['A4_Vertical']['encode_max_size'])
+
+    print(f"{len(TARGETS)} templates x {count} photos, {os.cpu_count()} CPU core(s)")
+    print(f"{'photos':>12} {'separate (s)':>13} {'combined (s)':>13} {'speed-up':>9}")
+    for label, photos in (("raw", raw), ("pre-encoded", encoded)):
+        separate = timed(lambda: [create_photo_report({}, photos, path, style) for path, style in TARGETS])
+        combined = timed(lambda: create_photo_reports({}, photos, TARGETS))
+        print(f"{label:>12} {separate:>13.2f} {combined:>13.2f} {separate / combined:>8.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+app.py with its session pre-loaded with photos, for interaction_latency.py.
+
+Run by `streamlit run`: the first run of each session spools and pre-processes
+$PHOTO_REPORT_BENCH_PHOTOS photos (as uploading them would), then every run
+executes the unmodified app.py.
+"""
+import io
+import os
+import runpy
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(PROJECT_ROOT, "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+import streamlit as st
+from PIL import Image
+from generator import list_templates, detect_layout_style
+from preprocess import PhotoPreprocessor
+from storage import UploadSpool
+
+APP_PATH = os.path.join(SRC_DIR, "app.py")
+ASSETS_DIR = os.path.join(PROJECT_ROOT, "assets")
+
+def build_session(count):
+    """Spool `count` photos and pre-process them for the template app.py selects by default"""
+    # The template selectbox in app.py defaults to the first template
+    layout_style = detect_layout_style(list_templates(ASSETS_DIR)[0])
+
+    photo = io.BytesIO()
+    Image.effect_noise((1600, 1200), 60).convert("RGB").save(photo, format="JPEG")
+
+    spool = UploadSpool(prefix="photo_report_bench_")
+    preprocessor = PhotoPreprocessor(ThreadPoolExecutor(max_workers=os.cpu_count() or 1))
+    preprocessor.set_target(layout_style)
+
+    names = [f"IMG_{i:04d}.jpg" for i in range(count)]
+    managed_files = {}
+    for name in names:
+        managed_files[name] = spool.add(name, photo)
+        preprocessor.submit(name, managed_files[name])
+    for name in names:
+        preprocessor.result(name)
+
+    return {
+        'managed_files': managed_files,
+        'file_order': list(names),
+        'deleted_files': set(),
+        'delete_history': [],
+        'upload_spool': spool,
+        'uploader_key': 0,
+        'preprocessor': preprocessor,
+    }
+
+if 'preprocessor' not in st.session_state:
+    for key, value in build_session(int(os.environ.get("PHOTO_REPORT_BENCH_PHOTOS", "50"))).items():
+        st.session_state[key] = value
+
+runpy.run_path(APP_PATH, run_name="__main__")
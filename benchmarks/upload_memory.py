@@ -0,0 +1,86 @@
+"""
+Resident memory while photos are uploaded in batches.
+
+Each batch is stored in Streamlit's MemoryUploadedFileManager for the running
+session, the same way the server's upload handler does. The batch is then spooled
+to disk the way app.py does it. RSS and the bytes still held by the manager are
+reported after every batch, with and without release_upload().
+
+  without release : what app.py did before; the manager keeps every upload
+                    until the session ends, so RSS grows with the photo count
+  with release    : uploads are removed from the manager once spooled
+
+Usage (from the project root, Linux):
+    python benchmarks/upload_memory.py [batches] [photos per batch]
+"""
+import os
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(PROJECT_ROOT, "src")
+sys.path.insert(0, SRC_DIR)
+
+from streamlit.testing.v1 import AppTest
+
+PHOTO_MB = 10
+
+def upload_script(batches, per_batch, photo_mb, release):
+    # Runs as an AppTest script so uploads go through a real ScriptRunContext
+    import gc
+    import os
+    import streamlit as st
+    from streamlit.proto.Common_pb2 import FileURLs
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    from streamlit.runtime.uploaded_file_manager import UploadedFile, UploadedFileRec
+    from storage import UploadSpool, release_upload
+
+    def rss_mb():
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+    ctx = get_script_run_ctx()
+    manager = ctx.uploaded_file_mgr
+    spool = UploadSpool(prefix="photo_report_bench_")
+    rows = [(0, rss_mb(), 0.0)]
+
+    for batch in range(batches):
+        uploaded_files = []
+        for i in range(per_batch):
+            file_id = f"{batch}-{i}"
+            rec = UploadedFileRec(file_id, f"IMG_{batch}_{i}.jpg", "image/jpeg", os.urandom(photo_mb * 2**20))
+            manager.add_file(ctx.session_id, rec)
+            uploaded_files.append(UploadedFile(rec, FileURLs(file_id=file_id)))
+            del rec
+
+        for f in uploaded_files:
+            spool.add(f.name, f)
+            if release:
+                release_upload(f)
+        del uploaded_files
+        gc.collect()
+
+        held = sum(len(rec.data) for rec in manager.file_storage.get(ctx.session_id, {}).values())
+        rows.append(((batch + 1) * per_batch, rss_mb(), held / 2**20))
+
+    spool.cleanup()
+    st.session_state.rows = rows
+
+def measure(batches, per_batch, release):
+    at = AppTest.from_function(upload_script, args=(batches, per_batch, PHOTO_MB, release), default_timeout=600)
+    at.run()
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+    return at.session_state.rows
+
+def main():
+    batches = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    per_batch = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    for release in (True, False):
+        print("with release_upload()" if release else "without release_upload()")
+        print(f"{'photos':>8} {'RSS (MB)':>10} {'held by uploader (MB)':>22}")
+        for count, rss, held in measure(batches, per_batch, release):
+            print(f"{count:>8} {rss:>10.1f} {held:>22.1f}")
+        print()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Time to build one large report as a single file vs split into volumes.
+
+Volumes are built in parallel processes (one per core), so the split run
+should approach single / cores on a multi-core machine. On a single core
+they are built one after another in-process, and the split run only adds
+the cost of repeating the template setup per volume.
+
+Photos are pre-encoded, as app.py passes them after background pre-processing.
+
+Usage (from the project root):
+    python benchmarks/volumes.py [photo count] [volumes]
+"""
+import os
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "src"))
+
+from PIL import Image
+from generator import create_photo_report, encode_photos, LAYOUT_STYLES
+
+TEMPLATE = os.path.join(PROJECT_ROOT, "assets", "上下兩張.docx")
+
+def make_photos(count):
+    """2400x1800 noise images; noise so no two photos are identical"""
+    return [
+        {'no': f"{i+1:02d}", 'image': Image.effect_noise((2400, 1800), 60 + i % 50).convert("RGB")}
+        for i in range(count)
+    ]
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 120
+    volumes = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    photos = encode_photos(make_photos(count), LAYOUT_STYLES['A4_Vertical']['encode_max_size'])
+
+    print(f"{count} photos, {os.cpu_count()} CPU core(s)")
+    print(f"{'output':>12} {'time (s)':>9}")
+    start = time.perf_counter()
+    create_photo_report({}, photos, TEMPLATE)
+    print(f"{'single':>12} {time.perf_counter() - start:>9.2f}")
+
+    start = time.perf_counter()
+    create_photo_report({}, photos, TEMPLATE, photos_per_volume=-(-count // volumes))
+    print(f"{f'{volumes} volumes':>12} {time.perf_counter() - start:>9.2f}")
+
+if __name__ == "__main__":
+    main()
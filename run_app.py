@@ -1,8 +1,12 @@
 import sys
 import os
+import multiprocessing
 import streamlit.web.cli as stcli
 
 def main():
+    # 分冊輸出會使用多個 process，打包成 EXE 時需要此呼叫
+    multiprocessing.freeze_support()
+
     # 當打包成 EXE 時，sys.executable 指向 exe 檔案
     # 我們假設 'app' 資料夾位於 exe 同一層目錄
     if getattr(sys, 'frozen', False):
@@ -1,9 +1,10 @@
 import streamlit as st
-import datetime
 import os
-from generator import create_photo_report, analyze_docx_structure
-from utils import load_image, crop_to_ratio, resize_with_padding
-from streamlit_sortables import sort_items
+from concurrent.futures import ThreadPoolExecutor
+from generator import create_photo_report, create_photo_reports, append_to_report, bundle_volumes, bundle_reports, analyze_docx_structure, list_templates, detect_layout_style
+from preprocess import PhotoPreprocessor
+from storage import UploadSpool, release_upload
+from cards import photo_card, sort_panel, collect_photos_data
 
 # Page Config
 st.set_page_config(
@@ -12,6 +13,11 @@ st.set_page_config(
     layout="wide"
 )
 
+@st.cache_resource
+def get_preprocess_executor():
+    # Shared by all sessions so background encoding never exceeds the core count
+    return ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="preprocess")
+
 # Custom CSS implementation
 st.markdown("""
 <style>
@@ -132,23 +138,30 @@ with st.sidebar:
         if not os.path.exists(assets_dir):
             os.makedirs(assets_dir)
             
-        templates = [f for f in os.listdir(assets_dir) if f.endswith(".docx") and not f.startswith("~$")]
+        templates = list_templates(assets_dir)
         
         selected_template = None
         layout_style_code = "A4_Vertical" # Default
+        extra_template_names = []
         
         if templates:
             template_name = st.selectbox("選擇 Word 模板", templates)
             selected_template = os.path.join(assets_dir, template_name)
             
             # Auto-detect Layout Mode based on filename
-            if "左右" in template_name or "Side" in template_name:
-                layout_style_code = "A4_SideBySide"
+            layout_style_code = detect_layout_style(template_name)
+            if layout_style_code == "A4_SideBySide":
                 st.caption("ℹ️ 模式：雙欄對照 (Side-by-Side)")
             else:
-                layout_style_code = "A4_Vertical"
                 st.caption("ℹ️ 模式：直式標準 (Vertical)")
 
+            # Extra templates rendered from the same photos in one pass
+            extra_template_names = st.multiselect(
+                "同時輸出其他模板",
+                [t for t in templates if t != template_name],
+                help="照片只處理一次即可同時產生多種版面，結果打包為 ZIP"
+            )
+
             # Analyzer Button
             if st.checkbox("🔍 顯示模板結構分析 (Debug)"):
                 if st.button("開始分析"):
@@ -157,57 +170,66 @@ with st.sidebar:
         else:
             st.error(f"❌ 無模板 (請將 .docx 放至 {assets_dir})")
 
+        # Multi-volume output for oversized cases (0 = single file)
+        st.markdown("**📦 分冊輸出**")
+        photos_per_volume = st.number_input("每冊照片數 (0 = 不分冊)", min_value=0, value=0, step=50)
+        max_volume_mb = st.number_input("每冊大小上限 MB (0 = 不限)", min_value=0, value=0, step=50)
+        if extra_template_names and (photos_per_volume or max_volume_mb):
+            st.caption("ℹ️ 同時輸出多個模板時不分冊")
+
 # --- Main Content ---
 
+# Session State for File Management
+if 'managed_files' not in st.session_state:
+    st.session_state.managed_files = {} # {filename: spooled path}
+if 'file_order' not in st.session_state:
+    st.session_state.file_order = []    # [filename1, filename2...]
+if 'deleted_files' not in st.session_state:
+    st.session_state.deleted_files = set() # {filename}
+if 'delete_history' not in st.session_state:
+    st.session_state.delete_history = [] # List of filenames
+if 'upload_spool' not in st.session_state:
+    st.session_state.upload_spool = UploadSpool() # Per-session temp dir, removed when the session ends
+if 'uploader_key' not in st.session_state:
+    st.session_state.uploader_key = 0
+if 'preprocessor' not in st.session_state:
+    st.session_state.preprocessor = PhotoPreprocessor(get_preprocess_executor())
+
+spool = st.session_state.upload_spool
+
+# Background pre-processing follows the selected layout's encode settings
+preprocessor = st.session_state.preprocessor
+preprocessor.set_target(layout_style_code)
+
 uploaded_files = st.file_uploader(
     "📤 上傳照片 (支援 JPG, PNG, HEIC)", 
     type=['jpg', 'jpeg', 'png', 'heic'], 
     accept_multiple_files=True,
-    help="可一次選擇多張照片，支援拖放上傳"
+    help="可一次選擇多張照片，支援拖放上傳；上傳後照片會移至下方清單",
+    key=f"uploader_{st.session_state.uploader_key}"
 )
 
-
-
-photos_data = []
-
+# Spool uploads to disk, release Streamlit's in-memory copies, then reset the uploader
 if uploaded_files:
+    for f in uploaded_files:
+        # Only add if NOT in managed files AND NOT explicitly deleted
+        if f.name not in st.session_state.managed_files:
+            if f.name not in st.session_state.deleted_files:
+                path = spool.add(f.name, f)
+                st.session_state.managed_files[f.name] = path
+                st.session_state.file_order.append(f.name)
+                # Start decoding/encoding right away
+                preprocessor.submit(f.name, path)
+        release_upload(f)
+    st.session_state.uploader_key += 1
+    st.rerun()
+
+if st.session_state.file_order or st.session_state.delete_history:
     # Sidebar - Photo Sorting
     with st.sidebar:
         st.markdown("---")
         st.subheader("🔃 照片排序")
         st.caption("拖曳下方項目以調整順序")
-        
-        # Session State for File Management
-        if 'managed_files' not in st.session_state:
-            st.session_state.managed_files = {} # {filename: file_obj}
-        if 'file_order' not in st.session_state:
-            st.session_state.file_order = []    # [filename1, filename2...]
-        if 'deleted_files' not in st.session_state:
-            st.session_state.deleted_files = set() # {filename}
-        if 'delete_history' not in st.session_state:
-            st.session_state.delete_history = [] # List of filenames
-
-        # Sync uploaded_files with Session State
-        current_filenames = [f.name for f in uploaded_files]
-        
-        # Add new files
-        for f in uploaded_files:
-            # Only add if NOT in managed files AND NOT explicitly deleted
-            if f.name not in st.session_state.managed_files:
-                if f.name not in st.session_state.deleted_files:
-                    st.session_state.managed_files[f.name] = f
-                    st.session_state.file_order.append(f.name)
-        
-        # Remove deleted files (This handles if user explicitly removes from widget)
-        keys_to_remove = []
-        for fname in st.session_state.managed_files:
-            if fname not in current_filenames:
-                keys_to_remove.append(fname)
-        
-        for k in keys_to_remove:
-            del st.session_state.managed_files[k]
-            if k in st.session_state.file_order:
-                st.session_state.file_order.remove(k)
 
         # Undo Delete Button
         if st.session_state.delete_history:
@@ -226,113 +248,77 @@ if uploaded_files:
                 if fname_to_restore in st.session_state.deleted_files:
                     st.session_state.deleted_files.remove(fname_to_restore)
                 
-                # 2. Find file object and restore
-                file_obj = next((f for f in uploaded_files if f.name == fname_to_restore), None)
-                if file_obj:
-                    st.session_state.managed_files[fname_to_restore] = file_obj
+                # 2. Restore from the spool (deleted files stay on disk for undo)
+                path = spool.path(fname_to_restore)
+                if path:
+                    st.session_state.managed_files[fname_to_restore] = path
                     if idx_to_restore != -1 and idx_to_restore <= len(st.session_state.file_order):
                         st.session_state.file_order.insert(idx_to_restore, fname_to_restore)
                     else:
                         st.session_state.file_order.append(fname_to_restore)
                 st.rerun()
 
-        # Sortable Component
-        if st.session_state.file_order:
-            display_order = [f"{i+1}. {fname}" for i, fname in enumerate(st.session_state.file_order)]
-            sorted_display = sort_items(display_order, direction='vertical')
-            
-            new_order = []
-            for item in sorted_display:
-                parts = item.split('. ', 1)
-                new_order.append(parts[1] if len(parts) == 2 else item)
-            
-            if new_order != st.session_state.file_order:
-                st.session_state.file_order = new_order
-                st.rerun()
-        else:
-            sorted_files = []
+        # Sortable Component (fragment: dragging only reruns the panel until the order changes)
+        sort_panel()
             
     # Main Loop - Photo Grid
-    sorted_file_objs = []
-    
     # Use current state order
-    for fname in st.session_state.file_order:
-        if fname in st.session_state.managed_files:
-            sorted_file_objs.append(st.session_state.managed_files[fname])
+    sorted_names = [fname for fname in st.session_state.file_order if fname in st.session_state.managed_files]
             
     # Dynamic column layout
-    st.info(f"📸 已載入 {len(sorted_file_objs)} 張照片")
+    st.info(f"📸 已載入 {len(sorted_names)} 張照片")
+
+    # Pre-processing Progress (polls until done, then reruns to show thumbnails)
+    done_count, total_count = preprocessor.progress(sorted_names)
+
+    @st.fragment(run_every=1.0 if done_count < total_count else None)
+    def show_preprocess_progress():
+        done, total = preprocessor.progress(sorted_names)
+        if done < total:
+            st.progress(done / total, text=f"⚙️ 背景影像預處理中 {done}/{total}")
+        elif done_count < total_count:
+            st.rerun()
+
+    show_preprocess_progress()
 
-    # Grid Layout - 3 Columns
-    for i in range(0, len(sorted_file_objs), 3):
-        files_batch = sorted_file_objs[i:i+3]
+    # Grid Layout - 3 Columns (each card is a fragment)
+    for i in range(0, len(sorted_names), 3):
+        names_batch = sorted_names[i:i+3]
         cols = st.columns(3)
         
-        for j, file in enumerate(files_batch):
-            idx = i + j
+        for j, fname in enumerate(names_batch):
             with cols[j]:
-                with st.container(border=True):
-                    # Toolbar Row
-                    c_title, c_del = st.columns([5, 1])
-                    with c_title:
-                        st.markdown(f"**#{idx+1} {file.name}**")
-                    with c_del:
-                        if st.button("🗑️", key=f"del_{file.name}"):
-                            # Delete Logic
-                            current_idx = -1
-                            if file.name in st.session_state.file_order:
-                                current_idx = st.session_state.file_order.index(file.name)
-                                st.session_state.file_order.remove(file.name)
-                            
-                            if file.name in st.session_state.managed_files:
-                                del st.session_state.managed_files[file.name]
-                                
-                            st.session_state.deleted_files.add(file.name)
-                            st.session_state.delete_history.append((current_idx, file.name))
-                            st.rerun()
-
-                    image = load_image(file)
-                    if image:
-                        # Image Preview
-                        thumb = resize_with_padding(image, target_ratio=14.4/9.8)
-                        st.image(thumb, use_container_width=True)
-                        
-                        unique_key = file.name
-                        def_time = datetime.datetime.now().strftime("%H:%M")
-                        
-                        # Data Inputs
-                        c1, c2 = st.columns(2)
-                        with c1:
-                            date_label = "日期" 
-                            date_help = f"預設: {report_date}" if report_date else "未填寫將使用空白"
-                            p_date = st.date_input(date_label, value=None, key=f"date_{unique_key}", help=date_help)
-                        with c2:
-                            p_time = st.text_input("時間", value=def_time, key=f"time_{unique_key}")
-                            
-                        p_location = st.text_input("📍 地點", value="", placeholder=f"同全域: {location}" if location else "", key=f"loc_{unique_key}")
-                        p_desc = st.text_area("📝 說明", value="", placeholder=f"同全域: {global_description}" if global_description else "", key=f"desc_{unique_key}", height=80)
-                        
-                        photos_data.append({
-                            'image': image,
-                            'no': f"{idx+1:02d}", 
-                            'date': str(p_date) if p_date else (str(report_date) if report_date else ""),
-                            'time': p_time,
-                            'location': p_location if p_location.strip() else location,
-                            'desc': (p_desc if p_desc.strip() else global_description).strip(),
-                            'filename': file.name
-                        })
+                photo_card(fname, i + j, preprocessor, report_date, location, global_description)
 
     st.markdown("---")
     
     # Generate Button Section
     col_l, col_c, col_r = st.columns([1, 2, 1])
     with col_c:
+        # Append Mode: add these photos to a previously generated report
+        existing_report = st.file_uploader(
+            "📎 附加至既有報表 (選填)",
+            type=['docx'],
+            help="上傳先前產生的報表，新照片會接續編號附加在最後，原有內容不會變動"
+        )
+        
         if st.button("🚀 生成 Word 報表", type="primary", use_container_width=True):
+            photos_data = collect_photos_data(sorted_names, report_date, location, global_description)
             if not photos_data:
                 st.warning("⚠️ 請先上傳並保留至少一張照片")
             else:
                 with st.spinner("⏳ 正在生成報表，請稍候..."):
                     try:
+                        # Collect pre-encoded images (waits only for photos still in the pipeline)
+                        for photo in photos_data:
+                            prepared = preprocessor.result(photo['filename'])
+                            if prepared:
+                                photo['encoded'] = prepared['encoded']
+                                photo['encoded_max_size'] = prepared['encoded_max_size']
+                                photo['size'] = prepared['size']
+                                photo['source'] = st.session_state.managed_files[photo['filename']]
+                        photos_data = [p for p in photos_data if 'encoded' in p]
+                        
                         context = {
                             'header_text': report_header,
                             '案由': subject,
@@ -341,20 +327,60 @@ if uploaded_files:
                             '日期': str(report_date) if report_date else ""
                         }
                         
-                        docx_file = create_photo_report(
-                            context,
-                            photos_data,
-                            selected_template,
-                            layout_style=layout_style_code
-                        )
+                        if existing_report:
+                            docx_file = append_to_report(
+                                existing_report,
+                                context,
+                                photos_data,
+                                selected_template,
+                                layout_style=layout_style_code
+                            )
+                            file_name = existing_report.name
+                        elif extra_template_names:
+                            # One pass over the photos for every selected template
+                            target_names = [template_name] + extra_template_names
+                            docx_files = create_photo_reports(
+                                context,
+                                photos_data,
+                                [(os.path.join(assets_dir, t), detect_layout_style(t)) for t in target_names]
+                            )
+                            base_name = f"{subject}_{report_date}" if subject and report_date else "現況照片報表"
+                            st.info(f"📦 已產生 {len(docx_files)} 種版面，打包為 ZIP 下載")
+                            docx_file = bundle_reports([
+                                (f"{base_name}_{os.path.splitext(t)[0]}.docx", f) for t, f in zip(target_names, docx_files)
+                            ])
+                            file_name = f"{base_name}.zip"
+                        else:
+                            docx_file = create_photo_report(
+                                context,
+                                photos_data,
+                                selected_template,
+                                layout_style=layout_style_code,
+                                photos_per_volume=photos_per_volume or None,
+                                max_volume_mb=max_volume_mb or None
+                            )
+                            file_name = f"{subject}_{report_date}.docx" if subject and report_date else "現況照片報表.docx"
+                        
+                        mime = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+                        if file_name.endswith(".zip"):
+                            mime = "application/zip"
+                        # Multi-volume output comes back as a list
+                        elif isinstance(docx_file, list):
+                            if len(docx_file) > 1:
+                                st.info(f"📦 已分為 {len(docx_file)} 冊，打包為 ZIP 下載")
+                                base_name = os.path.splitext(file_name)[0]
+                                docx_file = bundle_volumes(docx_file, base_name)
+                                file_name = f"{base_name}.zip"
+                                mime = "application/zip"
+                            else:
+                                docx_file = docx_file[0]
                         
-                        file_name = f"{subject}_{report_date}.docx" if subject and report_date else "現況照片報表.docx"
                         st.success("✅ 報表生成成功！")
                         st.download_button(
                             label="📥 點此下載 Word 檔", 
                             data=docx_file, 
                             file_name=file_name, 
-                            mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+                            mime=mime,
                             type="primary",
                             use_container_width=True
                         )
@@ -368,5 +394,6 @@ with st.sidebar:
         st.write("Session State Data:")
         st.json(st.session_state)
         if st.button("🗑️ 清除所有狀態 (Reset)"):
+            st.session_state.upload_spool.cleanup()
             st.session_state.clear()
             st.rerun()
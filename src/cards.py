@@ -0,0 +1,96 @@
+import streamlit as st
+import datetime
+from streamlit_sortables import sort_items
+
+# Each card and the sort panel are fragments: editing one card's inputs reruns
+# only that card instead of the whole app (sidebar, sort component, every card).
+# Anything that changes the grid itself (delete, reorder) triggers a full rerun.
+
+@st.fragment
+def photo_card(fname, idx, preprocessor, report_date, location, global_description):
+    with st.container(border=True):
+        # Toolbar Row
+        c_title, c_del = st.columns([5, 1])
+        with c_title:
+            st.markdown(f"**#{idx+1} {fname}**")
+        with c_del:
+            if st.button("🗑️", key=f"del_{fname}"):
+                # Delete Logic
+                current_idx = -1
+                if fname in st.session_state.file_order:
+                    current_idx = st.session_state.file_order.index(fname)
+                    st.session_state.file_order.remove(fname)
+
+                if fname in st.session_state.managed_files:
+                    del st.session_state.managed_files[fname]
+
+                st.session_state.deleted_files.add(fname)
+                st.session_state.delete_history.append((current_idx, fname))
+                st.rerun(scope="app")
+
+        if not preprocessor.is_ready(fname):
+            st.info("⏳ 影像預處理中...")
+            prepared = {}
+        else:
+            prepared = preprocessor.result(fname)
+
+        if prepared is None:
+            st.error("❌ 無法讀取此圖片")
+            return
+
+        # Image Preview
+        if prepared:
+            st.image(prepared['thumb'], use_container_width=True)
+
+        unique_key = fname
+        def_time = datetime.datetime.now().strftime("%H:%M")
+
+        # Data Inputs (values live in session_state, see collect_photos_data)
+        c1, c2 = st.columns(2)
+        with c1:
+            date_label = "日期"
+            date_help = f"預設: {report_date}" if report_date else "未填寫將使用空白"
+            st.date_input(date_label, value=None, key=f"date_{unique_key}", help=date_help)
+        with c2:
+            st.text_input("時間", value=def_time, key=f"time_{unique_key}")
+
+        st.text_input("📍 地點", value="", placeholder=f"同全域: {location}" if location else "", key=f"loc_{unique_key}")
+        st.text_area("📝 說明", value="", placeholder=f"同全域: {global_description}" if global_description else "", key=f"desc_{unique_key}", height=80)
+
+@st.fragment
+def sort_panel():
+    if not st.session_state.file_order:
+        return
+
+    display_order = [f"{i+1}. {fname}" for i, fname in enumerate(st.session_state.file_order)]
+    sorted_display = sort_items(display_order, direction='vertical')
+
+    new_order = []
+    for item in sorted_display:
+        parts = item.split('. ', 1)
+        new_order.append(parts[1] if len(parts) == 2 else item)
+
+    if new_order != st.session_state.file_order:
+        st.session_state.file_order = new_order
+        st.rerun(scope="app")
+
+def collect_photos_data(sorted_names, report_date, location, global_description):
+    """
+    Build photos_data from the card widgets' session_state (only needed when generating)
+    """
+    photos_data = []
+    for idx, fname in enumerate(sorted_names):
+        p_date = st.session_state.get(f"date_{fname}")
+        p_time = st.session_state.get(f"time_{fname}", "")
+        p_location = st.session_state.get(f"loc_{fname}", "")
+        p_desc = st.session_state.get(f"desc_{fname}", "")
+
+        photos_data.append({
+            'no': f"{idx+1:02d}",
+            'date': str(p_date) if p_date else (str(report_date) if report_date else ""),
+            'time': p_time,
+            'location': p_location if p_location.strip() else location,
+            'desc': (p_desc if p_desc.strip() else global_description).strip(),
+            'filename': fname
+        })
+    return photos_data
@@ -3,12 +3,24 @@ from docx.shared import Cm, Pt
 from docx.enum.text import WD_ALIGN_PARAGRAPH, WD_LINE_SPACING
 from docx.enum.table import WD_CELL_VERTICAL_ALIGNMENT
 from docx.oxml.ns import qn
-from docx.oxml import OxmlElement
+from docx.oxml import OxmlElement, parse_xml
+from docx.table import Table
+from docx.opc.constants import RELATIONSHIP_TYPE as RT, CONTENT_TYPE as CT
+from docx.opc.packuri import PackURI
+from docx.opc.part import Part
+from docx.opc.pkgwriter import PackageWriter
+from docx.image.image import Image as DocxImage
+from docx.oxml.shape import CT_Inline
+from docx.parts.image import ImagePart
+from lxml import etree
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from copy import deepcopy
 import io
+import multiprocessing
 import os
 import re
-from utils import compress_image
+import zipfile
+from utils import compress_image, load_image
 
 # --- Layout Configuration ---
 LAYOUT_STYLES = {
@@ -24,6 +36,7 @@ LAYOUT_STYLES = {
         'default_page_height': 29.7,
         'max_img_width': 14.4,
         'max_img_height': 9.8,
+        'encode_max_size': (1600, 1600),
         'suffix_mode': False # Use [Key] without number
     },
     'A4_SideBySide': {
@@ -38,10 +51,25 @@ LAYOUT_STYLES = {
         'default_page_height': 29.7,
         'max_img_width': 8.3,
         'max_img_height': 18.0,
+        'encode_max_size': (1600, 1600),
         'suffix_mode': True # Use [Key 1], [Key 2]
     }
 }
 
+def list_templates(assets_dir):
+    """Template .docx files in `assets_dir` (Word lock files skipped); the UI defaults to the first"""
+    return [f for f in os.listdir(assets_dir) if f.endswith(".docx") and not f.startswith("~$")]
+
+def detect_layout_style(template_name):
+    # Auto-detect Layout Mode based on filename
+    if "左右" in template_name or "Side" in template_name:
+        return "A4_SideBySide"
+    return "A4_Vertical"
+
+# Clean template table stored inside generated reports (enables append mode)
+TEMPLATE_PART_NS = 'urn:photo-report-generator:template'
+TEMPLATE_PARTNAME = '/customXml/photoReportTemplate.xml'
+
 def analyze_docx_structure(template_path):
     try:
         doc = Document(template_path)
@@ -61,10 +89,24 @@ def analyze_docx_structure(template_path):
     except Exception as e:
         return f"Error: {e}"
 
-def create_photo_report(context, photos, template_path=None, layout_style='A4_Vertical'):
+def create_photo_report(context, photos, template_path=None, layout_style='A4_Vertical',
+                        photos_per_volume=None, max_volume_mb=None, max_workers=None):
+    """
+    Build the report and return it as a BytesIO.
+    When `photos_per_volume` and/or `max_volume_mb` is given, the photos are split
+    into volumes built in parallel processes and a list of BytesIO is returned instead.
+    """
     if not template_path or not os.path.exists(template_path):
         return None
     
+    if photos_per_volume or max_volume_mb:
+        return create_report_volumes(
+            context, photos, template_path, layout_style,
+            photos_per_volume=photos_per_volume,
+            max_volume_mb=max_volume_mb,
+            max_workers=max_workers
+        )
+    
     # Load Config
     config = LAYOUT_STYLES.get(layout_style, LAYOUT_STYLES['A4_Vertical'])
     
@@ -94,67 +136,7 @@ def create_photo_report(context, photos, template_path=None, layout_style='A4_Ve
     for el in elements_to_remove:
         body_element.remove(el)
 
-    total_photos = len(photos)
-    items_per_table = config['items_per_table']
-    
-    # Loop through photos in chunks
-    for i in range(0, total_photos, items_per_table):
-        # Determine table to use
-        if i == 0:
-            current_table = master_table
-        else:
-            # Append Spacer
-            p = doc.add_paragraph()
-            p.paragraph_format.line_spacing_rule = WD_LINE_SPACING.EXACTLY
-            p.paragraph_format.line_spacing = Pt(config['table_spacing_pt'])
-            p.paragraph_format.space_before = Pt(0)
-            p.paragraph_format.space_after = Pt(0)
-            
-            # Minimize font size
-            run = p.add_run()
-            run.font.size = Pt(config['table_spacing_font_pt'])
-            
-            # Clone Table
-            new_tbl = deepcopy(template_tbl_xml)
-            doc.element.body.append(new_tbl)
-            current_table = doc.tables[-1]
-
-        # Prepare Batch Data & Mapping
-        # We need to constructing a single mapping for this table that includes all items in the batch
-        # e.g. [圖片 1] -> photo[i], [圖片 2] -> photo[i+1]
-        
-        vals_for_slot = {}
-        
-        # 1. Global Context (Static strings)
-        vals_for_slot[r"\[案由\]"] = context.get('案由', '')
-        vals_for_slot[r"\[製作人\]"] = context.get('製作人', '')
-        
-        # For Side-by-Side (or multi-item) layout, [日期] often refers to the Global Header Date
-        if config['items_per_table'] > 1:
-             vals_for_slot[r"\[日期\]"] = context.get('日期', '')
-        # If [日期] is meant to be the PHOTO date, we need to handle it per item.
-        
-        for idx, photo_data in enumerate(photos[i : i + items_per_table]):
-            # Suffix: if items_per_table > 1, we use " 1", " 2". 
-            # If items_per_table == 1, we use "" (empty).
-            
-            suffix = f" {idx+1}" if config['items_per_table'] > 1 else ""
-            
-            # Key Mapping
-            # Photo Data Keys: 'date', 'time', 'location', 'no', 'desc', 'image'
-            
-            # [日期 1], [時間 1], ...
-            vals_for_slot[fr"\[日期{suffix}\]"] = photo_data.get('date', '')
-            vals_for_slot[fr"\[時間{suffix}\]"] = photo_data.get('time', '')
-            vals_for_slot[fr"\[地點{suffix}\]"] = photo_data.get('location', '')
-            vals_for_slot[fr"\[編號{suffix}\]"] = photo_data.get('no', '')
-            vals_for_slot[fr"\[說明{suffix}\]"] = photo_data.get('desc', '')
-            
-            # Image is special object
-            vals_for_slot[fr"\[圖片{suffix}\]"] = {'type': 'image', 'val': photo_data.get('image')}
-
-        # Fill Data
-        fill_slot(current_table, vals_for_slot, config)
+    append_photo_tables(doc, template_tbl_xml, context, photos, config, first_table=master_table)
     
     # --- Finalize Layout (Apply at the VERY END) ---
     # Ensure a section exists for the whole doc
@@ -185,7 +167,7 @@ def create_photo_report(context, photos, template_path=None, layout_style='A4_Ve
             set_run_font(run, '標楷體', 24)
             
         # --- FOOTER ---
-        # Format: 第 X 頁 - 共 Y 頁
+        # Format: 第 X 頁 - 共 Y 頁 (prefixed with e.g. "第 1 冊 / 共 3 冊 - " for volumes)
         section.footer.is_linked_to_previous = False
         for p in section.footer.paragraphs:
             p._element.getparent().remove(p._element)
@@ -199,6 +181,12 @@ def create_photo_report(context, photos, template_path=None, layout_style='A4_Ve
             fldSimple.set(qn('w:instr'), instr_text)
             paragraph._element.append(fldSimple)
 
+        # Volume label (multi-volume output only)
+        volume_label = context.get('volume_label', '')
+        if volume_label:
+            r0 = footer_para.add_run(f"{volume_label} - ")
+            set_run_font(r0, '標楷體', 12)
+
         # "第 "
         r1 = footer_para.add_run("第 ")
         set_run_font(r1, '標楷體', 12)
@@ -217,17 +205,449 @@ def create_photo_report(context, photos, template_path=None, layout_style='A4_Ve
         r3 = footer_para.add_run(" 頁")
         set_run_font(r3, '標楷體', 12)
 
+    store_template_table(doc, template_tbl_xml, layout_style)
+
+    output = io.BytesIO()
+    save_document(doc, output)
+    output.seek(0)
+    return output
+
+def create_report_volumes(context, photos, template_path, layout_style='A4_Vertical',
+                          photos_per_volume=None, max_volume_mb=None, max_workers=None):
+    """
+    Split the photos into volumes and build each one in its own process.
+    Photo numbers ('no') are kept as given, so 編號 runs on across volumes;
+    page numbers restart in every volume. Returns a list of BytesIO.
+    """
+    config = LAYOUT_STYLES.get(layout_style, LAYOUT_STYLES['A4_Vertical'])
+
+    # Encode up front: size-based splitting needs the encoded sizes, and the
+    # worker processes then receive JPEG data instead of pickled PIL images
+    photos = encode_photos(photos, tuple(config['encode_max_size']), max_workers)
+    volumes = split_volumes(photos, config['items_per_table'], photos_per_volume, max_volume_mb)
+
+    jobs = []
+    for v_idx, volume_photos in enumerate(volumes):
+        volume_context = dict(context)
+        if len(volumes) > 1:
+            volume_context['volume_label'] = f"第 {v_idx+1} 冊 / 共 {len(volumes)} 冊"
+        jobs.append((volume_context, volume_photos))
+
+    return _build_reports_in_processes(
+        [(volume_context, volume_photos, template_path, layout_style) for volume_context, volume_photos in jobs],
+        max_workers
+    )
+
+def _build_reports_in_processes(jobs, max_workers=None):
+    """
+    Build one report per (context, photos, template_path, layout_style) job, each in
+    its own process. Runs in-process when there is a single job or a single core.
+    Returns a list of BytesIO in job order.
+    """
+    if not jobs:
+        return []
+    workers = max_workers or min(len(jobs), os.cpu_count() or 1)
+    if len(jobs) == 1 or workers == 1:
+        return [io.BytesIO(_build_report_bytes(*job)) for job in jobs]
+
+    # spawn everywhere: forking the Streamlit server (tornado, pre-process threads) can
+    # hand a child a held lock; Windows already spawns
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        futures = [executor.submit(_build_report_bytes, *job) for job in jobs]
+        return [io.BytesIO(future.result()) for future in futures]
+
+def _build_report_bytes(context, photos, template_path, layout_style):
+    # Process worker: return plain bytes so the result pickles cheaply
+    return create_photo_report(context, photos, template_path, layout_style).getvalue()
+
+def split_volumes(photos, items_per_table=1, photos_per_volume=None, max_volume_mb=None):
+    """
+    Split photos into consecutive volumes by count and/or encoded size.
+    Volumes always end on a table boundary so no table is split across files.
+    Size-based splitting needs every photo's 'encoded' data (see encode_photos).
+    """
+    per_volume = None
+    if photos_per_volume:
+        per_volume = max(items_per_table, photos_per_volume // items_per_table * items_per_table)
+    max_bytes = max_volume_mb * 1024 * 1024 if max_volume_mb else None
+
+    volumes = []
+    current, current_bytes = [], 0
+    for i in range(0, len(photos), items_per_table):
+        group = photos[i : i + items_per_table]
+        group_bytes = 0
+        if max_bytes:
+            sizes = [_encoded_size(photo) for photo in group]
+            if None in sizes:
+                raise ValueError("依大小分冊需要已編碼的照片 ('encoded')，請先以 encode_photos 編碼")
+            group_bytes = sum(sizes)
+
+        is_full = (
+            (per_volume and len(current) + len(group) > per_volume) or
+            (max_bytes and current_bytes + group_bytes > max_bytes)
+        )
+        if current and is_full:
+            volumes.append(current)
+            current, current_bytes = [], 0
+
+        current.extend(group)
+        current_bytes += group_bytes
+
+    if current or not volumes:
+        volumes.append(current)
+    return volumes
+
+def _encoded_size(photo):
+    encoded = photo.get('encoded')
+    if isinstance(encoded, bytes):
+        return len(encoded)
+    if isinstance(encoded, str) and os.path.exists(encoded):
+        return os.path.getsize(encoded)
+    return None
+
+def encode_photos(photos, encode_max_size, max_workers=None):
+    """
+    Return copies of `photos` carrying 'encoded' JPEG data at `encode_max_size`
+    (and 'size'), without PIL images. Photos already encoded at that size are reused.
+    """
+    size = tuple(encode_max_size)
+    return _encode_photos_for_sizes(photos, [size], max_workers)[size]
+
+def _encode_photos_for_sizes(photos, sizes, max_workers=None):
+    """
+    Like encode_photos for several sizes at once, decoding each photo at most once.
+    Returns {encode_max_size: photos}.
+    """
+    # Encode in threads (PIL releases the GIL while decoding/encoding)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        prepared = list(executor.map(lambda photo: _encode_for_sizes(photo, sizes), photos))
+    return {
+        size: [
+            dict(photo, encoded=encoded[size], encoded_max_size=size, size=image_size, image=None)
+            for photo, (encoded, image_size) in zip(photos, prepared)
+        ]
+        for size in sizes
+    }
+
+def create_photo_reports(context, photos, targets, max_workers=None):
+    """
+    Render one photo set into several templates in a single pass.
+    `targets` is a list of (template_path, layout_style). Every photo is decoded
+    at most once and encoded once per distinct 'encode_max_size'; targets that
+    share a resolution share the encoded JPEG. Documents are built in parallel
+    processes. Returns a list of BytesIO in the order of `targets` ([] for no targets).
+    """
+    for template_path, _ in targets:
+        if not template_path or not os.path.exists(template_path):
+            raise ValueError(f"找不到模板: {template_path}")
+
+    configs = [LAYOUT_STYLES.get(layout_style, LAYOUT_STYLES['A4_Vertical']) for _, layout_style in targets]
+    sizes = sorted({tuple(config['encode_max_size']) for config in configs})
+    photos_by_size = _encode_photos_for_sizes(photos, sizes, max_workers)
+
+    jobs = [
+        (context, photos_by_size[tuple(config['encode_max_size'])], template_path, layout_style)
+        for (template_path, layout_style), config in zip(targets, configs)
+    ]
+    return _build_reports_in_processes(jobs, max_workers)
+
+def _encode_for_sizes(photo, sizes):
+    """
+    Return ({encode_max_size: encoded}, image_size) for one photo, reusing the photo's
+    own 'encoded' when it already matches and decoding the source only if needed.
+    """
+    encoded_by_size = {}
+    image = photo.get('image')
+    for size in sizes:
+        encoded = photo.get('encoded')
+        encoded_size = photo.get('encoded_max_size')
+        if encoded is not None and (encoded_size is None or tuple(encoded_size) == size):
+            encoded_by_size[size] = encoded
+            continue
+        if image is None and photo.get('source'):
+            image = load_image(photo['source'])
+        if image is None:
+            # Nothing to re-encode from; fall back to whatever was given
+            encoded_by_size[size] = encoded
+            continue
+        encoded_by_size[size] = compress_image(image, max_size=size).getvalue()
+
+    image_size = photo.get('size')
+    if image_size is None:
+        image_size = image.size if image is not None else _encoded_dimensions(photo.get('encoded'))
+    return encoded_by_size, image_size
+
+def _encoded_dimensions(encoded):
+    """(width, height) of encoded image data (path or bytes) from its header, or None"""
+    if not encoded:
+        return None
+    image = DocxImage.from_file(io.BytesIO(encoded) if isinstance(encoded, bytes) else encoded)
+    return image.px_width, image.px_height
+
+def bundle_volumes(volumes, base_name):
+    """Pack volume BytesIO objects into a single zip"""
+    return bundle_reports([(f"{base_name}_第{v_idx+1}冊.docx", volume) for v_idx, volume in enumerate(volumes)])
+
+def bundle_reports(named_files):
+    """Pack [(file_name, BytesIO)] into a single zip (stored, .docx is already compressed)"""
+    output = io.BytesIO()
+    with zipfile.ZipFile(output, 'w', zipfile.ZIP_STORED) as zf:
+        for file_name, data in named_files:
+            zf.writestr(file_name, data.getvalue())
+    output.seek(0)
+    return output
+
+def append_to_report(report_file, context, photos, template_path=None, layout_style=None):
+    """
+    Append photos to a previously generated report without rebuilding it.
+    Existing tables, media, headers and footers are left untouched; only new
+    tables (and their images) are added and 編號 continues from the last table.
+
+    Template table lookup order: the copy stored in the report, the first table
+    of `template_path`, then the last table of the report if it still has placeholders.
+    `layout_style` only applies when the report has no stored template.
+    """
+    doc = Document(report_file)
+
+    template_tbl_xml, stored_layout = load_stored_template(doc)
+    if template_tbl_xml is None and template_path and os.path.exists(template_path):
+        template_doc = Document(template_path)
+        if template_doc.tables:
+            template_tbl_xml = deepcopy(template_doc.tables[0]._element)
+    if template_tbl_xml is None and doc.tables and re.search(r"\[圖片( \d+)?\]", doc.tables[-1]._element.xml):
+        template_tbl_xml = deepcopy(doc.tables[-1]._element)
+    if template_tbl_xml is None:
+        raise ValueError("找不到可用的模板表格，請指定原始模板")
+
+    layout_style = stored_layout or layout_style or 'A4_Vertical'
+    config = LAYOUT_STYLES.get(layout_style, LAYOUT_STYLES['A4_Vertical'])
+
+    # Continue numbering (keep the caller's photo dicts untouched)
+    last_no = find_last_photo_no(doc, template_tbl_xml, config)
+    photos = [dict(photo, no=f"{last_no + idx + 1:02d}") for idx, photo in enumerate(photos)]
+
+    append_photo_tables(doc, template_tbl_xml, context, photos, config)
+    store_template_table(doc, template_tbl_xml, layout_style)
+
     output = io.BytesIO()
-    doc.save(output)
+    save_document(doc, output)
     output.seek(0)
     return output
 
+def store_template_table(doc, template_tbl_xml, layout_style):
+    """Keep a clean copy of the template table in a customXml part of the report"""
+    root = etree.Element(f"{{{TEMPLATE_PART_NS}}}template", layout=layout_style)
+    root.append(deepcopy(template_tbl_xml))
+    blob = etree.tostring(root, xml_declaration=True, encoding='UTF-8', standalone=True)
+
+    # Parts have no public blob setter: replace an existing copy with a fresh part
+    rId = _find_template_rel(doc)
+    if rId is not None:
+        doc.part.drop_rel(rId)
+    part = Part(PackURI(TEMPLATE_PARTNAME), CT.XML, blob, doc.part.package)
+    doc.part.relate_to(part, RT.CUSTOM_XML)
+
+def load_stored_template(doc):
+    """Return (template_tbl_xml, layout_style) stored by store_template_table, or (None, None)"""
+    part = _find_template_part(doc)
+    if part is None:
+        return None, None
+    root = etree.fromstring(part.blob)
+    tbl = root.find(qn('w:tbl'))
+    if tbl is None:
+        return None, None
+    # Re-parse through python-docx so the table gets its custom element classes
+    return parse_xml(etree.tostring(tbl)), root.get('layout')
+
+def _find_template_rel(doc):
+    for rId, rel in doc.part.rels.items():
+        if rel.reltype == RT.CUSTOM_XML and not rel.is_external:
+            if rel.target_part.partname == TEMPLATE_PARTNAME:
+                return rId
+    return None
+
+def _find_template_part(doc):
+    rId = _find_template_rel(doc)
+    return doc.part.rels[rId].target_part if rId is not None else None
+
+def find_last_photo_no(doc, template_tbl_xml, config):
+    """
+    Read the highest 編號 in the report's last table, using the template to
+    locate the [編號] cells. Falls back to counting tables.
+    """
+    if not doc.tables:
+        return 0
+
+    template_table = Table(template_tbl_xml, doc._body)
+    last_table = doc.tables[-1]
+    numbers = []
+    for r_idx, row in enumerate(template_table.rows):
+        for c_idx, cell in enumerate(row.cells):
+            if not re.search(r"\[編號( \d+)?\]", cell.text):
+                continue
+            # Turn the template text into a pattern, e.g. "[編號]" -> "(\d+)"
+            parts = re.split(r"\[編號(?: \d+)?\]", cell.text.strip())
+            pattern = r"\s*(\d+)\s*".join(re.escape(part) for part in parts)
+            try:
+                filled = last_table.rows[r_idx].cells[c_idx].text.strip()
+            except IndexError:
+                continue
+            match = re.fullmatch(pattern, filled)
+            if match:
+                numbers.append(int(match.group(1)))
+
+    if numbers:
+        return max(numbers)
+    return len(doc.tables) * config['items_per_table']
+
+def append_photo_tables(doc, template_tbl_xml, context, photos, config, first_table=None):
+    """
+    Fill `photos` into clones of `template_tbl_xml` appended at the end of the body
+    (before the final sectPr, if any). `first_table` is filled first without cloning.
+    """
+    total_photos = len(photos)
+    items_per_table = config['items_per_table']
+    
+    picture_adder = PictureAdder(doc)
+    
+    # Loop through photos in chunks
+    for i in range(0, total_photos, items_per_table):
+        # Determine table to use
+        if i == 0 and first_table is not None:
+            current_table = first_table
+        else:
+            # Append Spacer
+            p = doc.add_paragraph()
+            p.paragraph_format.line_spacing_rule = WD_LINE_SPACING.EXACTLY
+            p.paragraph_format.line_spacing = Pt(config['table_spacing_pt'])
+            p.paragraph_format.space_before = Pt(0)
+            p.paragraph_format.space_after = Pt(0)
+            
+            # Minimize font size
+            run = p.add_run()
+            run.font.size = Pt(config['table_spacing_font_pt'])
+            
+            # Clone Table (right after the spacer, which python-docx keeps ahead of sectPr)
+            new_tbl = deepcopy(template_tbl_xml)
+            p._element.addnext(new_tbl)
+            current_table = Table(new_tbl, doc._body)
+
+        # Prepare Batch Data & Mapping
+        # We need to constructing a single mapping for this table that includes all items in the batch
+        # e.g. [圖片 1] -> photo[i], [圖片 2] -> photo[i+1]
+        
+        vals_for_slot = {}
+        
+        # 1. Global Context (Static strings)
+        vals_for_slot[r"\[案由\]"] = context.get('案由', '')
+        vals_for_slot[r"\[製作人\]"] = context.get('製作人', '')
+        
+        # For Side-by-Side (or multi-item) layout, [日期] often refers to the Global Header Date
+        if config['items_per_table'] > 1:
+             vals_for_slot[r"\[日期\]"] = context.get('日期', '')
+        # If [日期] is meant to be the PHOTO date, we need to handle it per item.
+        
+        for idx, photo_data in enumerate(photos[i : i + items_per_table]):
+            # Suffix: if items_per_table > 1, we use " 1", " 2". 
+            # If items_per_table == 1, we use "" (empty).
+            
+            suffix = f" {idx+1}" if config['items_per_table'] > 1 else ""
+            
+            # Key Mapping
+            # Photo Data Keys: 'date', 'time', 'location', 'no', 'desc', 'image'
+            # Optional pre-encoded keys (see preprocess.py): 'encoded' (path or bytes), 'size',
+            # 'encoded_max_size' and 'source' (path, for re-encoding in create_photo_reports)
+            
+            # [日期 1], [時間 1], ...
+            vals_for_slot[fr"\[日期{suffix}\]"] = photo_data.get('date', '')
+            vals_for_slot[fr"\[時間{suffix}\]"] = photo_data.get('time', '')
+            vals_for_slot[fr"\[地點{suffix}\]"] = photo_data.get('location', '')
+            vals_for_slot[fr"\[編號{suffix}\]"] = photo_data.get('no', '')
+            vals_for_slot[fr"\[說明{suffix}\]"] = photo_data.get('desc', '')
+            
+            # Image is special object
+            vals_for_slot[fr"\[圖片{suffix}\]"] = {
+                'type': 'image',
+                'val': photo_data.get('image'),
+                'encoded': photo_data.get('encoded'),
+                'size': photo_data.get('size')
+            }
+
+        # Fill Data
+        fill_slot(current_table, vals_for_slot, config, picture_adder)
+
+class _StoredMediaZipWriter:
+    # PackageWriter target that stores /word/media uncompressed (JPEG/PNG gain nothing from deflate)
+    def __init__(self, pkg_file):
+        self._zipf = zipfile.ZipFile(pkg_file, 'w', compression=zipfile.ZIP_DEFLATED)
+
+    def write(self, pack_uri, blob):
+        compress_type = zipfile.ZIP_STORED if pack_uri.startswith('/word/media/') else None
+        self._zipf.writestr(pack_uri.membername, blob, compress_type=compress_type)
+
+    def close(self):
+        self._zipf.close()
+
+# python-docx internals used by save_document (checked so an upgrade degrades to doc.save)
+_PACKAGE_WRITER_HOOKS = ('_write_content_types_stream', '_write_pkg_rels', '_write_parts')
+
+def save_document(doc, output):
+    """
+    Same as doc.save(), except images are stored instead of deflated.
+    Re-deflating every photo dominated saving large reports, and stored
+    media also make reopening a report (append mode) a plain read.
+    Falls back to doc.save() if this python-docx lacks the writer internals.
+    """
+    if not all(hasattr(PackageWriter, name) for name in _PACKAGE_WRITER_HOOKS):
+        doc.save(output)
+        return
+
+    package = doc.part.package
+    parts = package.parts
+    for part in parts:
+        part.before_marshal()
+    writer = _StoredMediaZipWriter(output)
+    PackageWriter._write_content_types_stream(writer, parts)
+    PackageWriter._write_pkg_rels(writer, package.rels)
+    PackageWriter._write_parts(writer, parts)
+    writer.close()
+
+class PictureAdder:
+    """
+    Add pictures without python-docx's duplicate-image check.
+    run.add_picture() re-hashes every image already in the package on each call
+    (ImagePart.sha1 is not cached) and rescans the XML for the next shape id, so
+    appending to a large report would scale with its size. Here the next media
+    number and shape id are computed once and then incremented.
+    """
+
+    def __init__(self, doc):
+        self._part = doc.part
+        self._image_parts = self._part.package.image_parts
+        used = [p.partname.idx for p in self._image_parts if p.partname.idx is not None]
+        self._next_image_no = max(used, default=0) + 1
+        self._next_shape_id = self._part.next_id
+
+    def add_picture(self, run, image_descriptor, width=None, height=None):
+        image = DocxImage.from_file(image_descriptor)
+        partname = PackURI(f"/word/media/image{self._next_image_no}.{image.ext}")
+        self._next_image_no += 1
+
+        image_part = ImagePart.from_image(image, partname)
+        self._image_parts.append(image_part)
+        rId = self._part.relate_to(image_part, RT.IMAGE)
+
+        cx, cy = image.scaled_dimensions(width, height)
+        inline = CT_Inline.new_pic_inline(self._next_shape_id, rId, image.filename, cx, cy)
+        self._next_shape_id += 1
+        run._r.add_drawing(inline)
+
 def set_run_font(run, font_name='標楷體', size_pt=12):
     run.font.name = font_name
     run.font.size = Pt(size_pt)
     run._element.rPr.rFonts.set(qn('w:eastAsia'), font_name)
 
-def fill_slot(table, vals_for_slot, config):
+def fill_slot(table, vals_for_slot, config, picture_adder=None):
     for row in table.rows:
         for cell in row.cells:
             for pattern, value in vals_for_slot.items():
@@ -235,22 +655,24 @@ def fill_slot(table, vals_for_slot, config):
                     
                     is_image = False
                     val_content = value
+                    encoded = None
                     
                     if isinstance(value, dict) and value.get('type') == 'image':
                         is_image = True
                         val_content = value.get('val')
+                        encoded = value.get('encoded')
                         
                     if is_image:
                         cell.text = re.sub(pattern, "", cell.text, flags=re.IGNORECASE)
                         paragraph = cell.paragraphs[0]
                         paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
                         run = paragraph.add_run()
-                        if val_content:
+                        if val_content or encoded:
                             # Calculate Aspect Ratio and Dimensions
                             max_w = config['max_img_width']
                             max_h = config['max_img_height']
                             
-                            img_w, img_h = val_content.size
+                            img_w, img_h = value.get('size') or (val_content.size if val_content else _encoded_dimensions(encoded))
                             img_ratio = img_w / img_h
                             target_ratio = max_w / max_h
                             
@@ -264,8 +686,15 @@ def fill_slot(table, vals_for_slot, config):
                                 # Height is the limiter
                                 final_height = Cm(max_h)
                             
-                            img_stream = compress_image(val_content, max_size=(1600, 1600))
-                            run.add_picture(img_stream, width=final_width, height=final_height)
+                            if encoded:
+                                # Already encoded in the background (file path or bytes)
+                                img_stream = io.BytesIO(encoded) if isinstance(encoded, bytes) else encoded
+                            else:
+                                img_stream = compress_image(val_content, max_size=config['encode_max_size'])
+                            if picture_adder:
+                                picture_adder.add_picture(run, img_stream, width=final_width, height=final_height)
+                            else:
+                                run.add_picture(img_stream, width=final_width, height=final_height)
                     else:
                         # Text Replace
                         # Note: We need to handle paragraphs carefully
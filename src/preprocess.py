@@ -0,0 +1,118 @@
+import os
+import threading
+from utils import load_image, compress_image, resize_with_padding
+from generator import LAYOUT_STYLES
+
+# Preview cards use the Vertical photo ratio (14.4 x 9.8) regardless of layout
+THUMB_RATIO = 14.4 / 9.8
+# A card is one of three grid columns; this is wide enough for it on HiDPI screens
+THUMB_WIDTH = 480
+
+def prepare_photo(source, encode_max_size, out_prefix, thumb_ratio=THUMB_RATIO):
+    """
+    解碼一張照片並將預覽縮圖與最終嵌入 Word 的 JPEG 寫入磁碟
+    回傳 {'size', 'thumb', 'encoded', 'encoded_max_size'} (thumb/encoded 為檔案路徑)，無法讀取時回傳 None
+    """
+    image = load_image(source)
+    if image is None:
+        return None
+
+    thumb_path = f"{out_prefix}_thumb.jpg"
+    thumb = resize_with_padding(image, target_ratio=thumb_ratio, base_w=THUMB_WIDTH)
+    thumb.save(thumb_path, format='JPEG', quality=85)
+
+    encoded_path = f"{out_prefix}.jpg"
+    with open(encoded_path, 'wb') as f:
+        f.write(compress_image(image, max_size=encode_max_size).getbuffer())
+
+    return {
+        'size': image.size,
+        'thumb': thumb_path,
+        'encoded': encoded_path,
+        'encoded_max_size': tuple(encode_max_size)
+    }
+
+def _remove_outputs(future):
+    # Done-callback for superseded jobs: delete whatever they wrote to the spool
+    if future.cancelled() or future.exception() is not None:
+        return
+    prepared = future.result()
+    if not prepared:
+        return
+    for path in (prepared['thumb'], prepared['encoded']):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+class PhotoPreprocessor:
+    """
+    背景預處理上傳的照片 (解碼、EXIF 轉正、縮圖、JPEG 編碼)，
+    讓使用者編輯說明的同時 CPU 就先把影像準備好，生成時只需組裝 XML。
+    結果綁定編碼參數 (encode_max_size、縮圖比例)，只有參數改變時才作廢並重新排程；
+    解析度相同的模板之間切換不必重新處理。
+    """
+
+    def __init__(self, executor):
+        self._executor = executor
+        self._lock = threading.Lock()
+        self._target = None  # (encode_max_size, thumb_ratio)
+        self._generation = 0
+        self._sources = {}  # {filename: source path}
+        self._jobs = {}     # {filename: Future}
+
+    def _submit(self, filename):
+        encode_max_size, thumb_ratio = self._target
+        # Outputs sit next to the spooled source; the generation keeps stale jobs from clobbering them
+        out_prefix = f"{os.path.splitext(self._sources[filename])[0]}_{self._generation}"
+        self._jobs[filename] = self._executor.submit(
+            prepare_photo, self._sources[filename], encode_max_size, out_prefix, thumb_ratio
+        )
+
+    def set_target(self, layout_style):
+        """切換排版：編碼參數改變時作廢舊結果並以新設定重新排程所有照片"""
+        config = LAYOUT_STYLES.get(layout_style, LAYOUT_STYLES['A4_Vertical'])
+        with self._lock:
+            target = (tuple(config['encode_max_size']), THUMB_RATIO)
+            if target == self._target:
+                return
+            self._target = target
+            self._generation += 1
+            for future in self._jobs.values():
+                # Jobs that already started still write their files; remove them once done
+                if not future.cancel():
+                    future.add_done_callback(_remove_outputs)
+            self._jobs = {}
+            for filename in self._sources:
+                self._submit(filename)
+
+    def submit(self, filename, source):
+        with self._lock:
+            if filename in self._sources:
+                return
+            self._sources[filename] = source
+            self._submit(filename)
+
+    def is_ready(self, filename):
+        with self._lock:
+            future = self._jobs.get(filename)
+        return future is not None and future.done()
+
+    def result(self, filename):
+        """取得預處理結果 (尚未完成時會等待)，無法讀取時回傳 None"""
+        with self._lock:
+            future = self._jobs.get(filename)
+        if future is None:
+            return None
+        try:
+            return future.result()
+        except Exception as e:
+            print(f"Error preparing image {filename}: {e}")
+            return None
+
+    def progress(self, filenames):
+        """回傳 (已完成數, 總數)"""
+        with self._lock:
+            futures = [self._jobs.get(f) for f in filenames]
+        done = sum(1 for f in futures if f is not None and f.done())
+        return done, len(futures)
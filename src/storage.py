@@ -0,0 +1,68 @@
+import itertools
+import os
+import shutil
+import tempfile
+import weakref
+
+# Streamlit internals, only used to free uploads early; release_upload() is a no-op without them
+try:
+    from streamlit.runtime.memory_uploaded_file_manager import MemoryUploadedFileManager
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+except ImportError:
+    MemoryUploadedFileManager = None
+    get_script_run_ctx = None
+
+class UploadSpool:
+    """
+    將上傳的照片寫入工作階段專屬的暫存資料夾，之後一律以檔案路徑串流讀取，
+    記憶體用量不隨照片張數增加。
+    物件被回收 (工作階段結束) 或程式結束時會自動刪除整個資料夾。
+    """
+
+    def __init__(self, prefix="photo_report_"):
+        self.root = tempfile.mkdtemp(prefix=prefix)
+        self._paths = {}  # {filename: spooled path}
+        self._ids = itertools.count()
+        self._finalizer = weakref.finalize(self, shutil.rmtree, self.root, ignore_errors=True)
+
+    def __contains__(self, name):
+        return name in self._paths
+
+    def add(self, name, file_obj):
+        """將上傳檔案分段寫入磁碟並回傳路徑 (同名檔案只寫一次)"""
+        if name in self._paths:
+            return self._paths[name]
+
+        # Use generated names so user filenames never touch the filesystem
+        ext = os.path.splitext(name)[1].lower()
+        path = os.path.join(self.root, f"{next(self._ids):05d}{ext}")
+        file_obj.seek(0)
+        with open(path, 'wb') as out:
+            shutil.copyfileobj(file_obj, out, 1024 * 1024)
+        self._paths[name] = path
+        return path
+
+    def path(self, name):
+        return self._paths.get(name)
+
+    def cleanup(self):
+        self._paths = {}
+        self._finalizer()
+
+def release_upload(uploaded_file):
+    """
+    從 Streamlit 的上傳管理器移除檔案內容 (寫入暫存區後呼叫)。
+    否則管理器會保留每個上傳檔案的 bytes 直到工作階段結束。
+    若此版 Streamlit 沒有對應的內部介面則不做任何事 (僅少了記憶體優化)。
+    """
+    if MemoryUploadedFileManager is None:
+        return
+    ctx = get_script_run_ctx()
+    # Same cleanup st.chat_input does; only MemoryUploadedFileManager implements remove_file
+    manager = getattr(ctx, 'uploaded_file_mgr', None)
+    if not isinstance(manager, MemoryUploadedFileManager):
+        return
+    try:
+        manager.remove_file(session_id=ctx.session_id, file_id=uploaded_file.file_id)
+    except (AttributeError, TypeError):
+        pass
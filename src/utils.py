@@ -69,7 +69,7 @@ def crop_to_ratio(image, target_ratio=1.47):
     else:
         return image.crop((0, offset, img_w, offset + new_h))
 
-def resize_with_padding(image, target_ratio=1.47, bg_color=(255, 255, 255)):
+def resize_with_padding(image, target_ratio=1.47, bg_color=(255, 255, 255), base_w=1000):
     """
     Resize image to fit within target aspect ratio, padding with background color.
     (Letterboxing)
@@ -77,8 +77,7 @@ def resize_with_padding(image, target_ratio=1.47, bg_color=(255, 255, 255)):
     img_w, img_h = image.size
     current_ratio = img_w / img_h
     
-    # Target dimensions (base on width=1000px for good resolution)
-    base_w = 1000
+    # Target dimensions (default width=1000px for good resolution)
     base_h = int(base_w / target_ratio)
     
     # Create background